@@ -3,21 +3,57 @@ import numpy as np
 import pandas as pd
 import requests 
 import time
+import os
+import hashlib
+import io
+import tempfile
+import json
 import plotly.graph_objects as go 
-from skyfield.api import load, EarthSatellite
+from skyfield.api import EarthSatellite
+from skyfield.iokit import parse_tle_file
+from sgp4.api import SatrecArray, jday
 from datetime import datetime, timezone
+from kernels import candidate_windows, closest_sample
 
 
 st.set_page_config(page_title="🛰️ Project Space Debris Alert Dashboard", layout="wide")
 
+PROPAGATION_BLOCK = 512  # satellites per batched SGP4 call
+COARSE_MINUTES = 10  # sampling step of the culling pass
+RELATIVE_VMAX_KM_S = 16.0  # upper bound on the closing speed of two Earth orbiters
+MAX_THRESHOLD_KM = 500.0  # top of the threshold slider; the analysis screens to this
+DOCKED_KM = 0.01  # closer than this is the same object (docked, duplicate TLE), not a conjunction
+PROGRESS_UPDATES = 20  # progress bar updates per analysis, whatever the catalog size
+LIVE_TLE_CACHE = "live_tle.txt"  # last successful CelesTrak download
+LIVE_TLE_TTL_S = 3600  # reuse a download for up to an hour
+LIVE_TLE_VALIDATORS = "live_tle.json"  # ETag / Last-Modified of that download
+
+def tle_digest(tle_text):
+    # Short digest that stands in for the multi-MB TLE text in cache keys
+    return hashlib.sha1(tle_text.encode()).hexdigest()[:16]
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def parse_tle(tle_key, _tle_text):
+    # Parsed satellites for one TLE text, keyed by its digest (see
+    # tle_digest()), so re-downloading unchanged elements or reloading the
+    # backup never parses the same text twice. Parses from memory, no file.
+    return list(parse_tle_file(io.BytesIO(_tle_text.encode())))
+
+
+@st.cache_resource(show_spinner=False)
+def read_backup_data():
+    # Backup text and satellites, read once per process. A failed read raises
+    # and isn't cached, so the next session tries again.
+    with open("active.txt", "r") as f:
+        tle_text = f.read()
+    return parse_tle(tle_digest(tle_text), tle_text), tle_text
+
+
 def load_backup_data():
     st.write("Loading local backup data (`active.txt`)...")
     try:
-        
-        all_satellites = load.tle_file("active.txt")
-        
-        with open("active.txt", "r") as f:
-            tle_text = f.read()
+        all_satellites, tle_text = read_backup_data()
         st.write(f"✅ Backup data loaded ({len(all_satellites)} objects).")
         return all_satellites, tle_text
     except Exception as e:
@@ -25,15 +61,87 @@ def load_backup_data():
         return [], ""
 
 
+def write_atomically(path, text):
+    # Write to a temporary file and rename it over path, so a crash or a
+    # concurrent session never leaves a half-written file behind. Each write
+    # gets its own temporary file, so concurrent writers never share one.
+    f = tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path) or ".", delete=False)
+    try:
+        with f:
+            f.write(text)
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+def load_saved_live_data():
+    # The last download, if it is younger than LIVE_TLE_TTL_S. CelesTrak only
+    # refreshes the elements a few times a day; past the TTL the download is
+    # revalidated (see download_live_data), never reused blindly.
+    if os.path.exists(LIVE_TLE_CACHE) and time.time() - os.path.getmtime(LIVE_TLE_CACHE) < LIVE_TLE_TTL_S:
+        with open(LIVE_TLE_CACHE, "r") as f:
+            tle_text = f.read()
+        all_satellites = parse_tle(tle_digest(tle_text), tle_text)
+        if all_satellites:
+            return all_satellites, tle_text
+    return None, None
+
+
 def download_live_data():
-    ts = load.timescale()
+    all_satellites, tle_text = load_saved_live_data()
+    if all_satellites:
+        st.success(f"✅ Live data loaded from the last download! Found {len(all_satellites)} satellites.")
+        return all_satellites, tle_text
+
     tle_url_active = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
     st.write(f"📡 Attempting to download LIVE data from: {tle_url_active}...")
+    # Revalidate an expired download instead of fetching it again: with the
+    # ETag / Last-Modified saved next to it (so they survive restarts),
+    # CelesTrak answers 304 Not Modified if the elements haven't changed.
+    headers = {}
+    if os.path.exists(LIVE_TLE_CACHE):
+        # Another session may remove them meanwhile; then fetch unconditionally
+        try:
+            with open(LIVE_TLE_VALIDATORS, "r") as f:
+                headers.update(json.load(f))
+        except (OSError, ValueError):
+            headers = {}
     try:
        
-        tle_text = requests.get(tle_url_active, timeout=20).text
-        
-        all_satellites = load.tle_file(tle_text.splitlines())
+        # A plain requests.get per download: a Session isn't documented as
+        # thread-safe for concurrent Streamlit sessions, and downloads are at
+        # most hourly, so there is no connection worth keeping alive
+        response = requests.get(tle_url_active, timeout=20, headers=headers)
+        # An error reply (e.g. 403) must not replace the saved download
+        response.raise_for_status()
+        if response.status_code == 304:
+            os.utime(LIVE_TLE_CACHE)
+            with open(LIVE_TLE_CACHE, "r") as f:
+                tle_text = f.read()
+            all_satellites = parse_tle(tle_digest(tle_text), tle_text)
+            st.success(f"✅ Live data unchanged since the last download! Found {len(all_satellites)} satellites.")
+            return all_satellites, tle_text
+
+        tle_text = response.text
+        all_satellites = parse_tle(tle_digest(tle_text), tle_text)
+        # Only a download that parses replaces the saved one
+        if not all_satellites:
+            st.error("❌ Live data download contained no satellites. Using backup.")
+            return None, None
+        # The old validators go first, so they can never end up next to a
+        # newer download
+        if os.path.exists(LIVE_TLE_VALIDATORS):
+            os.remove(LIVE_TLE_VALIDATORS)
+        write_atomically(LIVE_TLE_CACHE, tle_text)
+        validators = {}
+        if "ETag" in response.headers:
+            validators["If-None-Match"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            validators["If-Modified-Since"] = response.headers["Last-Modified"]
+        if validators:
+            write_atomically(LIVE_TLE_VALIDATORS, json.dumps(validators))
+
         st.success(f"✅ Live data loaded! Found {len(all_satellites)} satellites.")
         
         return all_satellites, tle_text
@@ -43,85 +151,252 @@ def download_live_data():
 
 
 
-@st.cache_data(show_spinner=True)
-def run_conjunction_analysis(ts_now_timestamp, tle_text, target_id, target_name, threshold_km):
-    ts = load.timescale()
-    
-    
-    with open("cache_tle.txt", "w") as f:
-        f.write(tle_text)
-    all_satellites = load.tle_file("cache_tle.txt")
+@st.cache_resource(show_spinner=False, max_entries=4)
+def catalog_index(tle_key, _satellites):
+    # Catalog-number lookup for one TLE text, built once per process and
+    # shared by every session using it
+    return {sat.model.satnum: sat for sat in _satellites}
+
+
+def start_jd(dt):
+    # SGP4's UTC (jd, fr) pair for the start of the analysis window
+    return jday(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second + dt.microsecond / 1e6)
+
+
+def minute_grid(jd0, fr0, minutes):
+    # SGP4's (jd, fr) pair for whole minutes after the UTC start jd0 + fr0.
+    # fr may run past 1; SGP4 only uses the sum.
+    return np.full(len(minutes), jd0), fr0 + minutes / 1440
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def propagate_target(_target_model, target_id, epoch_jd, jd0, fr0):
+    # The target's own 24 h track. target_id and the element-set epoch stand
+    # in for the unhashed Satrec in the cache key.
+    _, target_r, _ = _target_model.sgp4_array(*minute_grid(jd0, fr0, np.arange(0, 1440)))
+    return target_r
+
+
+def target_track(target_sat, jd0, fr0):
+    # Cached 24 h track of target_sat from the UTC start jd0 + fr0
+    target_epoch = target_sat.model.jdsatepoch + target_sat.model.jdsatepochF
+    return propagate_target(target_sat.model, target_sat.model.satnum, target_epoch, jd0, fr0)
+
+
+def coarse_grid(minutes, coarse_minutes):
+    # Every `coarse_minutes` plus the last minute
+    return np.unique(np.append(minutes[::coarse_minutes], minutes[-1]))
+
+
+@st.cache_resource(show_spinner="Propagating the catalog...", max_entries=2)
+def propagate_catalog(tle_key, jd0, fr0, coarse_minutes, _satellites):
+    # Target-independent coarse positions of the catalog as a (3, N, T) float32
+    # array, and each object's min/max sampled radius, shared (not unpickled)
+    # by every target for this data and minute
+    coarse = coarse_grid(np.arange(0, 1440), coarse_minutes)
+    # Consecutive-minute pairs for the drift estimate below
+    probes = np.array([0, 720, 1438])
+    samples = np.union1d(coarse, np.concatenate([probes, probes + 1]))
+    is_coarse = np.isin(samples, coarse)
+    first, second = np.searchsorted(samples, probes), np.searchsorted(samples, probes + 1)
+    jd, fr = minute_grid(jd0, fr0, samples)
+    models = [sat.model for sat in _satellites]
+    positions = np.empty((3, len(models), len(coarse)), dtype=np.float32)
+    valid = np.empty(len(models), dtype=np.bool_)
+    drift = np.empty(len(models), dtype=np.float32)
+    radius_band = np.empty((2, len(models)), dtype=np.float32)
+    # One C call per block keeps SGP4's float64 output small
+    for start in range(0, len(models), PROPAGATION_BLOCK):
+        e, r, v = SatrecArray(models[start:start + PROPAGATION_BLOCK]).sgp4(jd, fr)
+        block = slice(start, start + len(r))
+        positions[:, block] = r[:, is_coarse].transpose(2, 0, 1)
+        # Objects SGP4 can't propagate (decayed, bad elements) are skipped
+        valid[block] = ~e.any(axis=1)
+        # Far past epoch, SGP4 positions outrun its velocities; the excess (km/s) widens the pad
+        excess = np.linalg.norm((r[:, second] - r[:, first]) / 60 - (v[:, first] + v[:, second]) / 2, axis=2)
+        drift[block] = np.where(valid[block], excess.max(axis=1), 0)
+        radius = np.linalg.norm(r, axis=2)
+        radius_band[:, block] = radius.min(axis=1), radius.max(axis=1)
+    return positions, valid, drift, radius_band
+
+
+@st.cache_data(show_spinner=True, max_entries=16)
+def compute_min_distances(ts_now_timestamp, tle_key, _sat_by_id, target_id, coarse_minutes=COARSE_MINUTES):
+    # Closest approach of every object within MAX_THRESHOLD_KM (the slider only
+    # filters it); tle_key stands in for the unhashed _ arguments in the cache key
 
     start_time = time.time()
 
-    target_sat = next((sat for sat in all_satellites if sat.model.satnum == target_id), None)
+    target_sat = _sat_by_id.get(target_id)
     
     if not target_sat:
-        return [], 0.0, 0 
-
-    objects_to_check = [sat for sat in all_satellites if sat.model.satnum != target_id]
-    dangerous_approaches = []
-    
-    total_objects = len(objects_to_check)
-
-
-    dt = datetime.utcfromtimestamp(ts_now_timestamp).replace(tzinfo=timezone.utc)
-    t0 = ts.from_datetime(dt)
-    
-    t_range = t0 + (np.arange(0, 1440) / 1440)
-    target_pos = target_sat.at(t_range).position.km
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    status_text.text(f"Checking 0/{total_objects} objects...")
-
-    for i, debris in enumerate(objects_to_check):
-        debris_pos = debris.at(t_range).position.km
-        distance_km = np.linalg.norm(target_pos - debris_pos, axis=0)
-        min_distance = np.min(distance_km)
-
-        if 0.01 < min_distance < threshold_km:
-            min_index = np.argmin(distance_km)
-            time_of_closest_approach = t_range[min_index]
-            dangerous_approaches.append({
-                "name": debris.name,
-                "id": debris.model.satnum,
-                "distance_km": min_distance,
-                "time_utc": time_of_closest_approach.utc_strftime('%Y-%m-%d %H:%M:%S')
-            })
-
-        if (i + 1) % 100 == 0:
-            progress_bar.progress((i + 1) / total_objects)
-            status_text.text(f"Checked {i+1}/{total_objects} objects...")
-
-    progress_bar.progress(1.0)
-    status_text.text(f"✅ Analysis Complete! Checked {total_objects} objects.")
+        return pd.DataFrame(columns=["name", "id", "distance_km", "time_utc"]), 0.0, 0 
+
+    total_objects = len(_sat_by_id) - 1
+
+    satellites = list(_sat_by_id.values())
+    # Catalog numbers parallel to satellites, for vectorized matching
+    satnums = np.fromiter(_sat_by_id, dtype=np.int32, count=len(satellites))
+
+
+    dt = datetime.fromtimestamp(ts_now_timestamp, timezone.utc)
+    minutes = np.arange(0, 1440)
+
+    # SGP4 takes UTC Julian dates; its TEME positions are fine for distances
+    jd0, fr0 = start_jd(dt)
+    jd, fr = minute_grid(jd0, fr0, minutes)
+    target_r = target_track(target_sat, jd0, fr0)
+
+    # A minute can only alert if the coarse sample half a step away is within
+    # MAX_THRESHOLD_KM + pad_km, the closing speed (plus SGP4 drift) times that
+    coarse = coarse_grid(minutes, coarse_minutes)
+    window_start = np.searchsorted(minutes, coarse - coarse_minutes / 2, side='left')
+    window_end = np.searchsorted(minutes, coarse + coarse_minutes / 2, side='right')
+    (catalog_x, catalog_y, catalog_z), catalog_valid, catalog_drift, (low_km, high_km) = propagate_catalog(tle_key, jd0, fr0, coarse_minutes, satellites)
+    target_row = np.flatnonzero(satnums == target_id)[0]
+    target_drift = catalog_drift[target_row]
+    pad_km = (RELATIVE_VMAX_KM_S + catalog_drift + target_drift) * coarse_minutes * 60 / 2
+    # float32 is plenty for a cull padded by thousands of km; the fine pass is float64
+    coarse_target_x, coarse_target_y, coarse_target_z = np.ascontiguousarray(target_r[coarse].T, dtype=np.float32)
+    coarse_limit2 = ((MAX_THRESHOLD_KM + pad_km) ** 2).astype(np.float32)
+
+    # Altitude filter (|r1 - r2| >= ||r1| - |r2||) on the radii SGP4 actually
+    # reaches, not the mean elements'. Between coarse samples a radius moves
+    # less than the closing-speed pad, so pad_km widens the sampled bands.
+    in_band = ((low_km - pad_km < high_km[target_row] + MAX_THRESHOLD_KM)
+               & (high_km + pad_km > low_km[target_row] - MAX_THRESHOLD_KM))
+    # Candidates are indices into satellites and the coarse positions, minus the target
+    rows = np.flatnonzero(in_band & (satnums != target_id))
+    total_candidates = len(rows)
+
+    # Per-candidate results; names are only looked up for the hits
+    ids = satnums[rows]
+    closest_dist2 = np.full(total_candidates, np.inf)
+    closest_minute = np.zeros(total_candidates, dtype=np.int64)
+
+    # PROGRESS_UPDATES blocks, since each update is a websocket message
+    screen_block = max(1, -(-total_candidates // PROGRESS_UPDATES))
+    progress_bar = st.progress(0, text=f"Checking 0/{total_candidates} objects in the target's altitude band...")
+
+    # Scratch buffers for the fine pass, sliced to each object's window length
+    jd_buf = np.empty(len(minutes))
+    fr_buf = np.empty(len(minutes))
+
+    # Local names for the per-object fine pass
+    take, flatnonzero = np.take, np.flatnonzero
+
+    # Blocks keep the window masks small and move the progress bar
+    for start in range(0, total_candidates, screen_block):
+        block_rows = rows[start:start + screen_block]
+
+        windows = candidate_windows(catalog_x, catalog_y, catalog_z, block_rows,
+                                    coarse_target_x, coarse_target_y, coarse_target_z, coarse_limit2,
+                                    window_start, window_end, len(minutes))
+        windows[~catalog_valid[block_rows]] = False
+
+        # Fine pass: re-propagate each survivor around its candidate samples
+        for j in flatnonzero(windows.any(axis=1)):
+            debris = satellites[block_rows[j]]
+            fine = flatnonzero(windows[j])
+            n = len(fine)
+            e_fine, r_fine, _ = debris.model.sgp4_array(take(jd, fine, out=jd_buf[:n]),
+                                                        take(fr, fine, out=fr_buf[:n]))
+            if e_fine.any():
+                continue
+
+            min_dist2, min_index = closest_sample(r_fine, target_r, fine, DOCKED_KM ** 2)
+            closest_dist2[start + j] = min_dist2
+            closest_minute[start + j] = fine[min_index]
+
+        checked = start + len(block_rows)
+        progress_bar.progress(checked / total_candidates,
+                              text=f"Checked {checked}/{total_candidates} objects in the target's altitude band...")
+
+    progress_bar.progress(1.0, text=f"✅ Analysis Complete! Checked {total_objects} objects.")
+
+    # Compare squared distances; only the hits need a square root
+    hits = np.flatnonzero((closest_dist2 > DOCKED_KM ** 2) & (closest_dist2 < MAX_THRESHOLD_KM ** 2))
+    # Closest first; sorting the squared distances gives the same order
+    hits = hits[np.argsort(closest_dist2[hits], kind='stable')]
+    # Columns straight from the result arrays; times stay datetime64 until displayed
+    approaches = pd.DataFrame({
+        "name": [satellites[k].name for k in rows[hits]],
+        "id": ids[hits],
+        "distance_km": np.sqrt(closest_dist2[hits]),
+        "time_utc": np.datetime64(dt.replace(tzinfo=None), 's') + closest_minute[hits].astype('timedelta64[m]')
+    })
 
     total_time = time.time() - start_time
-    dangerous_approaches.sort(key=lambda x: x['distance_km'])
     
 
-    return dangerous_approaches, total_time, total_objects
+    return approaches, total_time, total_objects
+
+
+@st.cache_resource(show_spinner=False)
+def earth_mesh(subdivisions=2):
+    # Icosphere of radius 6371 km: an icosahedron whose faces are split in
+    # four `subdivisions` times (320 faces, 162 vertices for 2). Vertices and
+    # triangle indices for go.Mesh3d; the same for every plot.
+    phi = (1 + 5 ** 0.5) / 2
+    vertices = [(-1, phi, 0), (1, phi, 0), (-1, -phi, 0), (1, -phi, 0),
+                (0, -1, phi), (0, 1, phi), (0, -1, -phi), (0, 1, -phi),
+                (phi, 0, -1), (phi, 0, 1), (-phi, 0, -1), (-phi, 0, 1)]
+    vertices = [tuple(np.array(v) / np.linalg.norm(v)) for v in vertices]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+             (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+             (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+             (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    for _ in range(subdivisions):
+        # Shared edges get one midpoint, pushed out onto the unit sphere
+        midpoints = {}
+        for a, b in {tuple(sorted(edge)) for face in faces for edge in zip(face, face[1:] + face[:1])}:
+            m = np.add(vertices[a], vertices[b])
+            midpoints[a, b] = midpoints[b, a] = len(vertices)
+            vertices.append(tuple(m / np.linalg.norm(m)))
+        split = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoints[a, b], midpoints[b, c], midpoints[c, a]
+            split += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = split
+    x, y, z = 6371 * np.array(vertices).T
+    i, j, k = np.array(faces).T
+    return x, y, z, i, j, k
+
+
+def filter_by_threshold(approaches, threshold_km):
+    # approaches is sorted by distance, so the result stays sorted
+    return approaches[approaches["distance_km"] < threshold_km]
+
+
+def use_data(all_sats, tle, data_source):
+    st.session_state.all_satellites = all_sats
+    st.session_state.tle_key = tle_digest(tle)
+    st.session_state.sat_by_id = catalog_index(st.session_state.tle_key, all_sats)
+    st.session_state.data_source = data_source
 
 
 st.title("🛰️ Project 'Space Debris Alert Dashboard'")
 st.markdown("A real-time conjunction alert system to track threats to our key satellites.")
 
 
-ts = load.timescale()
-
-
 if 'data_loaded' not in st.session_state:
-    
-    all_sats, tle = load_backup_data()
-    st.session_state.all_satellites = all_sats
-    st.session_state.tle_text = tle
-    st.session_state.data_source = "Backup"
+    # The data source is kept in the URL (?data=live), so a reload or a
+    # shared link picks up the saved live download without fetching it again.
+    # If that download has expired, fall back to the backup until the next
+    # click on "Try Download Live Data".
+    live_sats, live_tle = None, None
+    if st.query_params.get("data") == "live":
+        live_sats, live_tle = load_saved_live_data()
+    if live_sats:
+        use_data(live_sats, live_tle, "Live")
+    else:
+        st.query_params.pop("data", None)
+        use_data(*load_backup_data(), "Backup")
     st.session_state.data_loaded = True
 
 
 st.sidebar.header("⚙️ Settings")
-threshold_km = st.sidebar.slider("Alert Distance Threshold (km)", 10.0, 500.0, 100.0, 10.0)
+threshold_km = st.sidebar.slider("Alert Distance Threshold (km)", 10.0, MAX_THRESHOLD_KM, 100.0, 10.0)
 st.sidebar.info("Adjust to control how close an object must be to trigger an alert.")
 
 st.sidebar.header("📘 About")
@@ -135,9 +410,9 @@ st.sidebar.header("🛰️ Data Source")
 if st.sidebar.button("🔄 Try Download Live Data"):
     new_sats, new_text = download_live_data()
     if new_sats:
-        st.session_state.all_satellites = new_sats
-        st.session_state.tle_text = new_text
-        st.session_state.data_source = "Live"
+        use_data(new_sats, new_text, "Live")
+        st.query_params["data"] = "live"
+        st.session_state.pop("last_run", None)
         st.rerun()
 
 
@@ -164,19 +439,25 @@ target_id_to_run = TARGETS[selected_name]
 
 
 if st.button(f"🚀 Run Analysis for {selected_name}"):
+    # Remember the run (to the whole minute, so repeated clicks within a
+    # minute reuse the caches); moving the threshold slider afterwards then
+    # re-filters the cached distances instead of propagating again
+    st.session_state.last_run = (target_id_to_run, datetime.now(timezone.utc).replace(second=0, microsecond=0).timestamp())
+
+last_run = st.session_state.get("last_run")
+if last_run and last_run[0] == target_id_to_run:
     st.write("---")
     st.header(f"Results for {selected_name}")
     
-    now_ts = datetime.utcnow().timestamp()
+    now_ts = last_run[1]
 
-    tle_text_to_use = st.session_state.tle_text
-    
-    dangerous_approaches, total_time, objects_checked = run_conjunction_analysis(
-        now_ts, tle_text_to_use, target_id_to_run, selected_name, threshold_km
+    approaches, total_time, objects_checked = compute_min_distances(
+        now_ts, st.session_state.tle_key, st.session_state.sat_by_id, target_id_to_run
     )
+    dangerous_approaches = filter_by_threshold(approaches, threshold_km)
 
    
-    if objects_checked == 0 and not dangerous_approaches:
+    if objects_checked == 0 and approaches.empty:
         st.error(f"Target {selected_name} not found in the TLE data.")
         st.stop()
 
@@ -188,35 +469,39 @@ if st.button(f"🚀 Run Analysis for {selected_name}"):
 
 
 
-    if not dangerous_approaches:
+    if dangerous_approaches.empty:
         st.success(f"✅ STATUS: GREEN — No objects within {threshold_km} km.")
     else:
         st.error(f"🚨 STATUS: RED — {len(dangerous_approaches)} Potential Conjunctions Found!")
-        df = pd.DataFrame([{
-            "Name": item['name'],
-            "ID": item['id'],
-            "Closest Distance (km)": f"{item['distance_km']:.2f}",
-            "Time of Approach (UTC)": item['time_utc']
-        } for item in dangerous_approaches])
+        df = pd.DataFrame({
+            "Name": dangerous_approaches['name'],
+            "ID": dangerous_approaches['id'],
+            "Closest Distance (km)": dangerous_approaches['distance_km'].map("{:.2f}".format),
+            "Time of Approach (UTC)": dangerous_approaches['time_utc'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        }).reset_index(drop=True)
         st.dataframe(df, use_container_width=True)
 
         # 3D Orbit Visualization (optional)
         st.subheader("🪐 3D Visualization (Closest Approach)")
         
         # Re-find the target_sat object here (it's fast)
-        target_sat = next((s for s in st.session_state.all_satellites if s.model.satnum == target_id_to_run), None)
+        target_sat = st.session_state.sat_by_id.get(target_id_to_run)
 
-        first = dangerous_approaches[0]
-        debris = next((s for s in st.session_state.all_satellites if s.model.satnum == first['id']), None)
+        first = dangerous_approaches.iloc[0]
+        debris = st.session_state.sat_by_id.get(int(first['id']))
         
         if debris and target_sat: # Check if both were found
             st.write(f"Plotting orbit for **{selected_name}** vs. **{first['name']}**...")
             
-            # Use the ts.now() Skyfield object directly
-            t_range_short = ts.now() + (np.arange(0, 120) / 1440)
-
-            target_path = target_sat.at(t_range_short).position.km
-            debris_path = debris.at(t_range_short).position.km
+            # The first two hours of the analysed window, every other minute:
+            # finer detail doesn't show at this scale. The target's track is
+            # the analysis' cached one; the debris needs one small SGP4 call.
+            # Both are TEME, like the analysis.
+            jd0, fr0 = start_jd(datetime.fromtimestamp(now_ts, timezone.utc))
+            plot_minutes = np.arange(0, 120, 2)
+            target_path = target_track(target_sat, jd0, fr0)[plot_minutes].T
+            _, debris_r, _ = debris.model.sgp4_array(*minute_grid(jd0, fr0, plot_minutes))
+            debris_path = debris_r.T
 
             fig = go.Figure()
             fig.add_trace(go.Scatter3d(x=target_path[0], y=target_path[1], z=target_path[2],
@@ -225,13 +510,13 @@ if st.button(f"🚀 Run Analysis for {selected_name}"):
                                         mode='lines', name=first['name'], line=dict(dash='dot', width=4)))
             
             # Add a sphere for Earth
-            fig.add_trace(go.Surface(
-                x=6371 * np.outer(np.cos(np.linspace(0, 2*np.pi, 30)), np.sin(np.linspace(0, np.pi, 30))),
-                y=6371 * np.outer(np.sin(np.linspace(0, 2*np.pi, 30)), np.sin(np.linspace(0, np.pi, 30))),
-                z=6371 * np.outer(np.ones(30), np.cos(np.linspace(0, np.pi, 30))),
-                colorscale=[[0, 'blue'], [1, 'blue']],
+            earth_x, earth_y, earth_z, earth_i, earth_j, earth_k = earth_mesh()
+            fig.add_trace(go.Mesh3d(
+                x=earth_x, y=earth_y, z=earth_z,
+                i=earth_i, j=earth_j, k=earth_k,
+                color='blue',
                 opacity=0.3,
-                showscale=False
+                hoverinfo='skip'
             ))
 
             fig.update_layout(
@@ -248,7 +533,7 @@ if st.button(f"🚀 Run Analysis for {selected_name}"):
         st.write("---") 
         st.subheader("⚠️ Insights & Recommendation")
 
-        closest_object = dangerous_approaches[0]
+        closest_object = dangerous_approaches.iloc[0]
         closest_dist = float(closest_object['distance_km'])
         closest_name = closest_object['name']
 
@@ -0,0 +1,56 @@
+# Numba kernels of the conjunction screen. They live outside app.py, which
+# Streamlit re-executes as a fresh __main__ on every rerun: as an imported
+# module they are compiled once per process, and cached on disk across restarts.
+import threading
+import numpy as np
+from numba import njit, prange
+
+
+# Streamlit sessions are threads of one process and may launch the parallel
+# kernel concurrently; Numba's default workqueue layer aborts then, so
+# launches are serialized instead of requiring TBB or OpenMP
+_parallel_launch = threading.Lock()
+
+
+@njit(parallel=True, fastmath=True, nogil=True, cache=True)
+def _candidate_windows(x, y, z, rows, target_x, target_y, target_z, limit2, window_start, window_end, n_minutes):
+    # Marks the minutes around each coarse sample of rows[n] within sqrt(limit2[k]);
+    # the distance loop is branch-free over unit-stride x, y, z rows, so it vectorizes
+    n_objects, n_coarse = rows.shape[0], x.shape[1]
+    windows = np.zeros((n_objects, n_minutes), dtype=np.bool_)
+    for n in prange(n_objects):
+        k = rows[n]
+        near = np.empty(n_coarse, dtype=np.bool_)
+        for c in range(n_coarse):
+            dx = x[k, c] - target_x[c]
+            dy = y[k, c] - target_y[c]
+            dz = z[k, c] - target_z[c]
+            near[c] = dx * dx + dy * dy + dz * dz < limit2[k]
+        for c in range(n_coarse):
+            if near[c]:
+                windows[n, window_start[c]:window_end[c]] = True
+    return windows
+
+
+def candidate_windows(*args):
+    # _candidate_windows, one launch at a time (see _parallel_launch)
+    with _parallel_launch:
+        return _candidate_windows(*args)
+
+
+@njit(nogil=True, cache=True)
+def closest_sample(r, target_r, minutes, docked2):
+    # Smallest squared distance between r[i] and target_r[minutes[i]] and its
+    # first i; stops below docked2, since docked objects are dropped anyway
+    best, best_i = np.inf, 0
+    for i in range(minutes.shape[0]):
+        m = minutes[i]
+        dx = r[i, 0] - target_r[m, 0]
+        dy = r[i, 1] - target_r[m, 1]
+        dz = r[i, 2] - target_r[m, 2]
+        d2 = dx * dx + dy * dy + dz * dz
+        if d2 < best:
+            best, best_i = d2, i
+            if best < docked2:
+                break
+    return best, best_i